@@ -0,0 +1,23 @@
+# Gunicorn settings, picked up by `gunicorn main:app` from this folder
+import os
+
+bind = f"0.0.0.0:{os.environ.get('PORT', 10000)}"
+
+# Requests spend most of their time waiting on HF Router and SerpAPI, so each
+# worker serves many of them at once on threads
+worker_class = "gthread"
+workers = int(os.environ.get("WEB_CONCURRENCY", 4))
+threads = int(os.environ.get("GUNICORN_THREADS", 25))
+
+# Restart a worker whose main thread stops responding for this long. Under gthread
+# the heartbeat comes from the main thread, so this does not limit how long a single
+# request may run; that is bounded in main.py by PIPELINE_TIMEOUT and the AI client's
+# per-call timeout and retries
+timeout = 120
+
+
+def post_worker_init(worker):
+    # Pre-warm outbound connections so the first request skips the TLS handshakes
+    import main
+
+    main.warm_up()
@@ -1,24 +1,128 @@
 import sqlite3
 import os
-import json
 import re
-import requests
+import asyncio
+import concurrent.futures
+import threading
+import hashlib
+import time
+from collections import OrderedDict
+import click
+import httpx
+import orjson
 from flask import Flask, render_template, request, jsonify
+from flask.json.provider import DefaultJSONProvider
 from flask_cors import CORS
 from dotenv import load_dotenv
-from openai import OpenAI
+from openai import AsyncOpenAI, BadRequestError
 
 # Load environment variables
 load_dotenv()
 
+
+# JSON provider backed by orjson, used by jsonify and any request.json parsing
+class OrjsonProvider(DefaultJSONProvider):
+    def dumps(self, obj, **kwargs):
+        option = orjson.OPT_SORT_KEYS if self.sort_keys else 0
+        return orjson.dumps(obj, default=self.default, option=option).decode()
+
+    def loads(self, s, **kwargs):
+        return orjson.loads(s)
+
+
 # Initialize Flask App
 app = Flask(__name__, template_folder="templates")
+app.json = OrjsonProvider(app)
 CORS(app)
 
 # Load API Keys
 HF_TOKEN = os.getenv("HF_TOKEN")          # <--- set this in your .env
 SERPAPI_KEY = os.getenv("SERPAPI_KEY")
 
+# Shared async LLM client (HF Router is OpenAI-compatible), reused across requests
+_ai_client = None
+_ai_client_lock = threading.Lock()
+AI_REQUEST_TIMEOUT = 60  # seconds per attempt; the client retries once
+
+
+# Shared HTTP/2 client for web search, keeps TLS connections alive between calls
+def new_http_client() -> httpx.AsyncClient:
+    return httpx.AsyncClient(
+        http2=True,
+        limits=httpx.Limits(max_connections=50, max_keepalive_connections=20),
+        timeout=10,
+    )
+
+
+http_client = new_http_client()
+
+# Background event loop: every request runs its pipeline here, so the async
+# clients and their connection pools stay bound to a single loop. Its thread is
+# started on first use in each process, so importing (or forking after import) is safe
+_loop = None
+_loop_pid = None
+_loop_lock = threading.Lock()
+
+# Upper bound on how long a request waits for its pipeline
+PIPELINE_TIMEOUT = 300  # seconds
+
+
+def get_loop() -> asyncio.AbstractEventLoop:
+    """Returns this process's background loop, starting its thread if needed"""
+    global _loop, _loop_pid, _ai_client, http_client
+    if _loop_pid != os.getpid():
+        with _loop_lock:
+            if _loop_pid != os.getpid():
+                if _loop_pid is not None:
+                    # Forked: the parent's loop thread and pooled connections don't exist here
+                    _ai_client = None
+                    http_client = new_http_client()
+                _loop = asyncio.new_event_loop()
+                threading.Thread(target=_loop.run_forever, daemon=True).start()
+                _loop_pid = os.getpid()
+    return _loop
+
+
+def run_async(coro, timeout: float = PIPELINE_TIMEOUT):
+    """Runs a coroutine on the background loop and blocks until it finishes or times out"""
+    future = asyncio.run_coroutine_threadsafe(coro, get_loop())
+    try:
+        return future.result(timeout)
+    except concurrent.futures.TimeoutError:
+        future.cancel()
+        raise
+
+
+def get_ai_client():
+    """Returns the shared AI client, creating it once HF_TOKEN is available"""
+    global _ai_client
+    if _ai_client is None and HF_TOKEN:
+        with _ai_client_lock:
+            if _ai_client is None:
+                _ai_client = AsyncOpenAI(
+                    base_url="https://router.huggingface.co/v1",
+                    api_key=HF_TOKEN,
+                    timeout=AI_REQUEST_TIMEOUT,
+                    max_retries=1,
+                )
+    return _ai_client
+
+
+async def warm_connections():
+    # Open the TLS connections to HF Router and SerpAPI before real traffic arrives;
+    # failures don't matter here, the first real request just connects itself
+    calls = [http_client.get("https://serpapi.com/", timeout=5)]
+    client = get_ai_client()
+    if client:
+        calls.append(client.models.list())
+    await asyncio.gather(*calls, return_exceptions=True)
+
+
+def warm_up():
+    """Starts warming connections on the background loop without waiting for it"""
+    return asyncio.run_coroutine_threadsafe(warm_connections(), get_loop())
+
+
 # Ensure 'data' folder exists
 if not os.path.exists("data"):
     os.makedirs("data")
@@ -27,102 +131,327 @@ if not os.path.exists("data"):
 DB_FILE = os.path.join("data", "memory.db")
 
 
+# One SQLite connection per thread, opened lazily and kept for the thread's lifetime
+_db_local = threading.local()
+
+
+def _connect() -> sqlite3.Connection:
+    """Opens a tuned connection without touching the schema"""
+    # Autocommit mode: each statement is its own transaction
+    conn = sqlite3.connect(DB_FILE, check_same_thread=False, isolation_level=None)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    conn.execute("PRAGMA temp_store=MEMORY")
+    conn.execute("PRAGMA cache_size=-64000")
+    return conn
+
+
+def db() -> sqlite3.Connection:
+    """Returns this thread's database connection, opening it on first use"""
+    conn = getattr(_db_local, "conn", None)
+    if conn is None:
+        # Runs before the connection is kept, so a failed init is retried on the next call
+        init_db()  # No-op once this process has seen a current schema
+        conn = _connect()
+        _db_local.conn = conn
+    return conn
+
+
+# Each task's result is stored as one orjson payload, looked up by a fixed-width
+# hash of the task; task is kept as plain text for display
+RESEARCH_TABLE_SQL = """
+    CREATE TABLE IF NOT EXISTS research_data (
+        task_hash BLOB PRIMARY KEY,
+        task TEXT,
+        payload BLOB
+    )
+"""
+
+# Bump when the schema changes; stored in the database as PRAGMA user_version
+SCHEMA_VERSION = 1
+
+_db_initialized = False
+_db_init_lock = threading.Lock()
+
+
+def task_hash(task: str) -> bytes:
+    return hashlib.blake2b(task.encode(), digest_size=16).digest()
+
+
+def load_lines(value: str):
+    """Parses a stored list of lines; older rows hold plain newline-separated text"""
+    if value.startswith("["):
+        try:
+            return orjson.loads(value)
+        except orjson.JSONDecodeError:
+            pass
+    return value.split("\n")
+
+
+def legacy_result(row) -> dict:
+    """Builds a result dict from a row of the old one-column-per-field schema"""
+    return {
+        "Task": row[0],
+        "Generated Hypotheses": load_lines(row[1]),
+        "Web Research": orjson.loads(row[2]),
+        "Analysis": load_lines(row[3]),
+        "Reasoning": load_lines(row[4]),
+        "Evaluation": load_lines(row[5]),
+        "Summary": load_lines(row[6]),
+        "Conclusion": load_lines(row[7]),
+    }
+
+
 # Database Initialization
 def init_db():
-    """Creates the database if it doesn't exist"""
-    with sqlite3.connect(DB_FILE) as conn:
-        cursor = conn.cursor()
-        cursor.execute(
+    """Creates or upgrades the database schema, unless it is already current"""
+    global _db_initialized
+    if _db_initialized:
+        return
+
+    with _db_init_lock:
+        if _db_initialized:
+            return
+
+        # A dedicated connection: going through db() would re-enter init_db
+        conn = _connect()
+        try:
+            if conn.execute("PRAGMA user_version").fetchone()[0] < SCHEMA_VERSION:
+                with conn:  # one transaction, rolled back if any step fails
+                    # IMMEDIATE takes the write lock up front, so concurrent workers wait here
+                    conn.execute("BEGIN IMMEDIATE")
+                    if conn.execute("PRAGMA user_version").fetchone()[0] < SCHEMA_VERSION:
+                        create_schema(conn.cursor())
+                        conn.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+        finally:
+            conn.close()
+
+        _db_initialized = True
+
+
+def create_schema(cursor: sqlite3.Cursor):
+    cursor.execute(RESEARCH_TABLE_SQL)
+
+    columns = [row[1] for row in cursor.execute("PRAGMA table_info(research_data)")]
+    if "payload" not in columns:
+        # Older databases keep one column per field: fold each row into a payload
+        rows = cursor.execute(
             """
-            CREATE TABLE IF NOT EXISTS research_data (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                task TEXT UNIQUE,
-                hypotheses TEXT,
-                web_research TEXT,
-                analysis TEXT,
-                reasoning TEXT,
-                evaluation TEXT,
-                summary TEXT,
-                conclusion TEXT
-            )
+            SELECT task, hypotheses, web_research, analysis, reasoning, evaluation, summary, conclusion
+            FROM research_data ORDER BY id
             """
+        ).fetchall()
+        cursor.execute("DROP TABLE research_data")
+        cursor.execute(RESEARCH_TABLE_SQL)
+        cursor.executemany(
+            "INSERT OR IGNORE INTO research_data (task_hash, task, payload) VALUES (?, ?, ?)",
+            [
+                (task_hash(row[0]), row[0], orjson.dumps(legacy_result(row)))
+                for row in rows
+            ],
+        )
+
+    cursor.execute(
+        """
+        CREATE TABLE IF NOT EXISTS prompt_cache (
+            hash TEXT PRIMARY KEY,
+            response TEXT
+        )
+        """
+    )
+    cursor.execute(
+        """
+        CREATE TABLE IF NOT EXISTS web_cache (
+            query_hash BLOB PRIMARY KEY,
+            ts INTEGER,
+            payload BLOB
         )
-        conn.commit()
+        """
+    )
+
+
+@app.cli.command("init-db")
+def init_db_command():
+    """Creates or upgrades the database schema"""
+    init_db()
+    click.echo(f"Database ready: {DB_FILE}")
+
 
+# Markdown markers stripped from answers in one pass: bold/list asterisks and code backticks
+MARKDOWN_DELETE_TABLE = str.maketrans("", "", "*`")
 
-init_db()  # Ensure the database is initialized
+# Common headings, normalized to clean form "Heading:"
+HEADING_NAMES = {
+    "analysis": "Analysis",
+    "summary": "Summary",
+    "conclusion": "Conclusion",
+    "evaluation": "Evaluation",
+    "reasoning": "Reasoning",
+    "hypotheses": "Hypotheses",
+    "key insights": "Key Insights",
+    "recommendation": "Recommendation",
+}
+
+# Single-pass cleanup pattern, compiled once at import: either a composite label
+# you don't want at all ("remove") or a common heading at line start ("heading")
+CLEANUP_RE = re.compile(
+    r"(?P<remove>Multiple Perspectives\s*:\s*)"
+    rf"|^\s*(?P<heading>{'|'.join(HEADING_NAMES)})\s*:\s*",
+    re.IGNORECASE | re.MULTILINE,
+)
+
+
+def cleanup_replacement(m: re.Match) -> str:
+    if m.group("remove"):
+        return ""
+    return f"{HEADING_NAMES[m.group('heading').lower()]}: "
 
 
 # Helper: clean/normalize headings in model text
 def clean_headings(text: str) -> str:
-    # 1. Remove composite labels you don't want at all
-    remove_patterns = [
-        r"\*\*\s*Multiple Perspectives\s*:\s*",
-        r"\*\s*Multiple Perspectives\s*:\s*",
-        r"Multiple Perspectives\s*:\s*",
-    ]
-    for pat in remove_patterns:
-        text = re.sub(pat, "", text, flags=re.IGNORECASE)
-
-    # 2. Remove all asterisks so no **bold** or *list* markers remain
-    text = text.replace("*", "")
-
-    # 3. Normalize common headings to clean form "Heading:"
-    normalize_map = {
-        "analysis": "Analysis",
-        "summary": "Summary",
-        "conclusion": "Conclusion",
-        "evaluation": "Evaluation",
-        "reasoning": "Reasoning",
-        "hypotheses": "Hypotheses",
-        "key insights": "Key Insights",
-        "recommendation": "Recommendation",
-    }
-    for key, proper in normalize_map.items():
-        pattern = rf"(?mi)^\s*{key}\s*:\s*"
-        replacement = f"{proper}: "
-        text = re.sub(pattern, replacement, text)
+    # 1. Remove all asterisks and backticks so no **bold**, *list* or `code` markers remain
+    text = text.translate(MARKDOWN_DELETE_TABLE)
+
+    # 2. In one pass, drop composite labels and normalize common headings to "Heading:"
+    text = CLEANUP_RE.sub(cleanup_replacement, text)
 
     return text.strip()
 
 
+AI_MODEL = "meta-llama/Llama-3.1-8B-Instruct:novita"
+
+SYSTEM_PROMPT = (
+    "You are a clear, step-by-step research assistant. "
+    "Answer in simple English using short paragraphs and numbered/bullet lists when useful. "
+    "Avoid custom labels like 'Multiple Perspectives:'. "
+    "Headings should be simple plain text like 'Summary:' or 'Recommendation:'. "
+    "Do not use Markdown bold or asterisks."
+)
+
+# Greedy, penalty-free decoding: the same prompt gives the same answer, so answers cache well
+DECODING_PARAMS = {
+    "temperature": 0.0,
+    "top_p": 1.0,
+    "frequency_penalty": 0.0,
+    "presence_penalty": 0.0,
+}
+
+# Research steps returned by the single structured (JSON mode) call
+RESEARCH_STEPS = ("hypotheses", "analysis", "reasoning", "evaluation", "summary", "conclusion")
+
+# Cleared when the model rejects JSON mode as unsupported, so later tasks go straight to the step-by-step path
+structured_mode_enabled = True
+
+
+# Streams a chat completion from Hugging Face Router, yielding text as it is generated
+async def stream_ai_response(client, prompt: str, **params):
+    stream = await client.chat.completions.create(
+        model=AI_MODEL,
+        messages=[
+            {"role": "system", "content": SYSTEM_PROMPT},
+            {"role": "user", "content": prompt},
+        ],
+        stream=True,
+        **params,
+    )
+    async for chunk in stream:
+        if chunk.choices and chunk.choices[0].delta.content:
+            yield chunk.choices[0].delta.content
+
+
 # Function to Fetch AI Responses via Hugging Face Router (OpenAI-compatible)
-def fetch_ai_response(prompt: str) -> str:
-    if not HF_TOKEN:
+async def fetch_ai_response(prompt: str, max_tokens: int = 512) -> str:
+    client = get_ai_client()
+    if not client:
         return "AI Request failed: HF_TOKEN is not set in environment variables"
 
-    client = OpenAI(
-        base_url="https://router.huggingface.co/v1",
-        api_key=HF_TOKEN,
-    )
-
-    system_prompt = (
-        "You are a clear, step-by-step research assistant. "
-        "Answer in simple English using short paragraphs and numbered/bullet lists when useful. "
-        "Avoid custom labels like 'Multiple Perspectives:'. "
-        "Headings should be simple plain text like 'Summary:' or 'Recommendation:'. "
-        "Do not use Markdown bold or asterisks."
-    )
+    params = {"max_tokens": max_tokens, **DECODING_PARAMS}
+    cached = get_cached_response(prompt, params)
+    if cached is not None:
+        return cached
 
     try:
-        completion = client.chat.completions.create(
-            model="meta-llama/Llama-3.1-8B-Instruct:novita",
-            messages=[
-                {"role": "system", "content": system_prompt},
-                {"role": "user", "content": prompt},
-            ],
-            temperature=0.4,
-            max_tokens=512,
-        )
-        raw_text = completion.choices[0].message.content
+        pieces = [piece async for piece in stream_ai_response(client, prompt, **params)]
+        raw_text = "".join(pieces)
         cleaned = clean_headings(raw_text)
+        cache_response(prompt, params, cleaned)
         return cleaned
     except Exception as e:
         return f"AI Request failed: {str(e)}"
 
 
+def json_mode_unsupported(error: BadRequestError) -> bool:
+    """True when a 400 says the model or provider doesn't support JSON mode"""
+    text = f"{error.param or ''} {error.code or ''} {error.message}".lower()
+    return any(marker in text for marker in ("response_format", "json_object", "json mode"))
+
+
+# Function to Fetch All Research Steps in One Structured (JSON mode) Call
+async def fetch_structured_research(task: str, web_results):
+    """Returns a dict with every research step, or None if the model can't provide it"""
+    global structured_mode_enabled
+    client = get_ai_client()
+    if not client or not structured_mode_enabled:
+        return None
+
+    prompt = (
+        f"Research task: {task}\n\nWeb Research:\n{web_results}\n\n"
+        "Work through these steps in order, each one building on the previous:\n"
+        "1. hypotheses: Generate possible hypotheses based on the task.\n"
+        "2. analysis: Analyze the hypotheses and the web research.\n"
+        "3. reasoning: Provide logical reasoning based on the analysis.\n"
+        "4. evaluation: Evaluate different perspectives based on the reasoning.\n"
+        "5. summary: Summarize key insights from the evaluation.\n"
+        "6. conclusion: Based on the summary, provide a structured conclusion.\n"
+        "Respond only with a JSON object whose keys are "
+        f"{', '.join(RESEARCH_STEPS)} and whose values are plain text."
+    )
+
+    params = {
+        "response_format": {"type": "json_object"},
+        "max_tokens": 2048,
+        **DECODING_PARAMS,
+    }
+    raw_text = get_cached_response(prompt, params)
+    if raw_text is None:
+        try:
+            pieces = [piece async for piece in stream_ai_response(client, prompt, **params)]
+            raw_text = "".join(pieces)
+        except BadRequestError as e:
+            # Only a rejected JSON mode rules it out for later tasks; other 400s
+            # (e.g. a prompt over the context length) just fall back for this task
+            if json_mode_unsupported(e):
+                structured_mode_enabled = False
+            return None
+        except Exception:
+            return None
+
+    try:
+        data = orjson.loads(raw_text)
+    except orjson.JSONDecodeError:
+        return None
+
+    steps = {}
+    for key in RESEARCH_STEPS:
+        value = data.get(key) if isinstance(data, dict) else None
+        if isinstance(value, list):
+            value = "\n".join(str(item) for item in value)
+        if not isinstance(value, str) or not value.strip():
+            return None
+        steps[key] = value.strip()
+
+    cache_response(prompt, params, raw_text)
+    return steps
+
+
 # Web Extractor: Retrieves Information from the Web
-def fetch_web_results(query: str):
+async def fetch_web_results(query: str):
+    # Searches are case-insensitive, so equivalent queries share a cache entry
+    query = query.strip().lower()
+    cached = get_cached_web_results(query)
+    if cached is not None:
+        return cached
+
     search_url = "https://serpapi.com/search"
     params = {
         "q": query,
@@ -131,10 +460,13 @@ def fetch_web_results(query: str):
         "num": 5,
     }
 
+    if not SERPAPI_KEY:
+        return []
+
     try:
-        response = requests.get(search_url, params=params)
+        response = await http_client.get(search_url, params=params)
         response.raise_for_status()
-        results = response.json()
+        results = orjson.loads(response.content)
 
         if "organic_results" not in results:
             return []
@@ -148,125 +480,193 @@ def fetch_web_results(query: str):
             for item in results.get("organic_results", [])[:5]
         ]
 
+        cache_web_results(query, formatted_results)
         return formatted_results
 
-    except requests.exceptions.RequestException:
+    except (httpx.HTTPError, orjson.JSONDecodeError):
         return []
 
 
-# Store data in SQLite
-def store_in_db(
-    task,
-    hypothesis,
-    web_research,
-    analysis,
-    reasoning,
-    evaluation,
-    summary,
-    conclusion,
-):
-    with sqlite3.connect(DB_FILE) as conn:
-        cursor = conn.cursor()
-        cursor.execute(
-            """
-            INSERT INTO research_data 
-                (task, hypotheses, web_research, analysis, reasoning, evaluation, summary, conclusion)
-            VALUES (?, ?, ?, ?, ?, ?, ?, ?)
-            ON CONFLICT(task) DO UPDATE SET
-                hypotheses=excluded.hypotheses,
-                web_research=excluded.web_research,
-                analysis=excluded.analysis,
-                reasoning=excluded.reasoning,
-                evaluation=excluded.evaluation,
-                summary=excluded.summary,
-                conclusion=excluded.conclusion
-            """,
-            (
-                task,
-                hypothesis,
-                json.dumps(web_research),
-                analysis,
-                reasoning,
-                evaluation,
-                summary,
-                conclusion,
-            ),
-        )
-        conn.commit()
+# Store data in SQLite: the whole result, as returned by /supervisor, in one payload
+def store_in_db(result: dict):
+    db().execute(
+        "INSERT OR IGNORE INTO research_data (task_hash, task, payload) VALUES (?, ?, ?)",
+        (task_hash(result["Task"]), result["Task"], orjson.dumps(result)),
+    )
 
 
 # Retrieve stored task from database
 def get_from_db(task: str):
-    with sqlite3.connect(DB_FILE) as conn:
-        cursor = conn.cursor()
-        cursor.execute("SELECT * FROM research_data WHERE task = ?", (task,))
-        row = cursor.fetchone()
-
-        if row:
-            return {
-                "Task": row[1],
-                "Generated Hypotheses": row[2].split("\n"),
-                "Web Research": json.loads(row[3]),
-                "Analysis": row[4].split("\n"),
-                "Reasoning": row[5].split("\n"),
-                "Evaluation": row[6].split("\n"),
-                "Summary": row[7].split("\n"),
-                "Conclusion": row[8].split("\n"),
-            }
-        return None
+    row = db().execute(
+        "SELECT payload FROM research_data WHERE task_hash = ?", (task_hash(task),)
+    ).fetchone()
+    return orjson.loads(row[0]) if row else None
 
 
-# Supervisor Agent: Handles All AI & Web Processing
-@app.route("/supervisor", methods=["POST"])
-def supervisor_agent():
-    data = request.json
-    task = data.get("task", "").strip()
+# Prompt cache: recent answers in memory, all answers in SQLite
+PROMPT_CACHE_SIZE = 2048
+_prompt_cache = OrderedDict()
 
-    if not task:
-        return jsonify({"error": "Missing task parameter"}), 400
 
-    # Check if task exists in DB
-    stored_result = get_from_db(task)
-    if stored_result:
-        return jsonify(stored_result)
+def prompt_hash(prompt: str, params: dict) -> str:
+    """Keys an answer on everything that shapes it: model, system prompt, prompt and request params"""
+    key_data = orjson.dumps(
+        [AI_MODEL, SYSTEM_PROMPT, prompt, params], option=orjson.OPT_SORT_KEYS
+    )
+    return hashlib.blake2b(key_data, digest_size=16).hexdigest()
+
+
+def get_cached_response(prompt: str, params: dict):
+    key = prompt_hash(prompt, params)
+    if key in _prompt_cache:
+        _prompt_cache.move_to_end(key)
+        return _prompt_cache[key]
+
+    row = db().execute(
+        "SELECT response FROM prompt_cache WHERE hash = ?", (key,)
+    ).fetchone()
+    if row:
+        remember_response(key, row[0])
+        return row[0]
+    return None
+
+
+def cache_response(prompt: str, params: dict, response: str):
+    key = prompt_hash(prompt, params)
+    db().execute(
+        "INSERT OR REPLACE INTO prompt_cache (hash, response) VALUES (?, ?)",
+        (key, response),
+    )
+    remember_response(key, response)
+
+
+def remember_response(key: str, response: str):
+    _prompt_cache[key] = response
+    _prompt_cache.move_to_end(key)
+    if len(_prompt_cache) > PROMPT_CACHE_SIZE:
+        _prompt_cache.popitem(last=False)
 
+
+# Web search cache: recent results in memory, results younger than WEB_CACHE_TTL in SQLite
+WEB_CACHE_SIZE = 512
+WEB_CACHE_TTL = 24 * 60 * 60  # seconds
+_web_cache = OrderedDict()
+
+
+def query_hash(query: str) -> bytes:
+    return hashlib.blake2b(query.encode(), digest_size=16).digest()
+
+
+def get_cached_web_results(query: str):
+    key = query_hash(query)
+    now = int(time.time())
+    if key in _web_cache:
+        ts, results = _web_cache[key]
+        if now - ts < WEB_CACHE_TTL:
+            _web_cache.move_to_end(key)
+            return results
+        del _web_cache[key]
+
+    row = db().execute(
+        "SELECT ts, payload FROM web_cache WHERE query_hash = ? AND ts > ?",
+        (key, now - WEB_CACHE_TTL),
+    ).fetchone()
+    if row:
+        results = orjson.loads(row[1])
+        remember_web_results(key, row[0], results)
+        return results
+    return None
+
+
+def cache_web_results(query: str, results: list):
+    key = query_hash(query)
+    now = int(time.time())
+    db().execute(
+        "INSERT OR REPLACE INTO web_cache (query_hash, ts, payload) VALUES (?, ?, ?)",
+        (key, now, orjson.dumps(results)),
+    )
+    remember_web_results(key, now, results)
+
+
+def remember_web_results(key: bytes, ts: int, results: list):
+    _web_cache[key] = (ts, results)
+    _web_cache.move_to_end(key)
+    if len(_web_cache) > WEB_CACHE_SIZE:
+        _web_cache.popitem(last=False)
+
+
+# Research Pipeline: runs the AI & web steps for a task on the background loop
+async def research_pipeline(task: str):
+    if not structured_mode_enabled:
+        return await stepwise_pipeline(task)
+
+    # Web research feeds every step, so fetch it first
+    web_results = await fetch_web_results(task)
+
+    # One JSON-mode call for all steps; fall back to one call per step
+    steps = await fetch_structured_research(task, web_results)
+    if steps is None:
+        return await stepwise_pipeline(task, web_results)
+
+    return (
+        steps["hypotheses"],
+        web_results,
+        steps["analysis"],
+        steps["reasoning"],
+        steps["evaluation"],
+        steps["summary"],
+        steps["conclusion"],
+    )
+
+
+# Step-by-step pipeline, for models without JSON mode
+async def stepwise_pipeline(task: str, web_results=None):
     # Step 1: Generate Hypotheses
     hypothesis_prompt = f"Generate possible hypotheses based on: {task}"
-    hypothesis_response = fetch_ai_response(hypothesis_prompt)
-
-    # Step 2: Fetch Web Results
-    web_results = fetch_web_results(task)
+    if web_results is None:
+        # Steps 1 & 2 are independent: generate hypotheses while searching the web
+        hypothesis_response, web_results = await asyncio.gather(
+            fetch_ai_response(hypothesis_prompt, max_tokens=256),
+            fetch_web_results(task),
+        )
+    else:
+        hypothesis_response = await fetch_ai_response(hypothesis_prompt, max_tokens=256)
 
     # Step 3: Perform Analysis
     analysis_prompt = (
         "Analyze the following hypotheses and web research:\n"
         f"Hypotheses:\n{hypothesis_response}\n\nWeb Research:\n{web_results}"
     )
-    analysis_response = fetch_ai_response(analysis_prompt)
+    analysis_response = await fetch_ai_response(analysis_prompt)
 
+    # Steps 4-6 only need the analysis, so they run concurrently
     # Step 4: Provide Logical Reasoning
     reasoning_prompt = f"Provide logical reasoning based on this analysis:\n{analysis_response}"
-    reasoning_response = fetch_ai_response(reasoning_prompt)
 
     # Step 5: Evaluate Different Perspectives
     evaluation_prompt = (
-        f"Evaluate different perspectives based on the reasoning:\n{reasoning_response}"
+        f"Evaluate different perspectives based on this analysis:\n{analysis_response}"
     )
-    evaluation_response = fetch_ai_response(evaluation_prompt)
 
     # Step 6: Summarize Key Insights
-    summary_prompt = f"Summarize key insights from evaluation:\n{evaluation_response}"
-    summary_response = fetch_ai_response(summary_prompt)
+    summary_prompt = f"Summarize key insights from this analysis:\n{analysis_response}"
 
-    # Step 7: Provide Conclusion
+    reasoning_response, evaluation_response, summary_response = await asyncio.gather(
+        fetch_ai_response(reasoning_prompt, max_tokens=384),
+        fetch_ai_response(evaluation_prompt),
+        fetch_ai_response(summary_prompt, max_tokens=256),
+    )
+
+    # Step 7: Provide Conclusion, combining the reasoning, evaluation and summary
     conclusion_prompt = (
-        f"Based on the summary, provide a structured conclusion:\n{summary_response}"
+        "Based on the reasoning, evaluation and summary below, provide a structured conclusion:\n"
+        f"Reasoning:\n{reasoning_response}\n\n"
+        f"Evaluation:\n{evaluation_response}\n\n"
+        f"Summary:\n{summary_response}"
     )
-    conclusion_response = fetch_ai_response(conclusion_prompt)
+    conclusion_response = await fetch_ai_response(conclusion_prompt, max_tokens=256)
 
-    # Store in Database
-    store_in_db(
-        task,
+    return (
         hypothesis_response,
         web_results,
         analysis_response,
@@ -276,6 +676,45 @@ def supervisor_agent():
         conclusion_response,
     )
 
+
+# Supervisor Agent: Handles All AI & Web Processing
+@app.route("/supervisor", methods=["POST"])
+def supervisor_agent():
+    # Parse the small JSON body straight from the raw bytes
+    body = request.get_data(cache=False)
+    try:
+        data = orjson.loads(body) if body else {}
+    except orjson.JSONDecodeError:
+        return jsonify({"error": "Invalid JSON body"}), 400
+    if not isinstance(data, dict):
+        return jsonify({"error": "Invalid JSON body"}), 400
+
+    task = data.get("task", "")
+    if not isinstance(task, str):
+        return jsonify({"error": "Missing task parameter"}), 400
+    task = task.strip()
+
+    if not task:
+        return jsonify({"error": "Missing task parameter"}), 400
+
+    # Check if task exists in DB
+    stored_result = get_from_db(task)
+    if stored_result:
+        return jsonify(stored_result)
+
+    try:
+        (
+            hypothesis_response,
+            web_results,
+            analysis_response,
+            reasoning_response,
+            evaluation_response,
+            summary_response,
+            conclusion_response,
+        ) = run_async(research_pipeline(task))
+    except concurrent.futures.TimeoutError:
+        return jsonify({"error": "Research timed out, please try again"}), 504
+
     # Return the structured response
     formatted_response = {
         "Task": task,
@@ -288,16 +727,18 @@ def supervisor_agent():
         "Conclusion": conclusion_response.split("\n"),
     }
 
+    # Store in Database
+    store_in_db(formatted_response)
+
     return jsonify(formatted_response)
 
 
 # Fetch past queries
 @app.route("/past_queries", methods=["GET"])
 def get_past_queries():
-    with sqlite3.connect(DB_FILE) as conn:
-        cursor = conn.cursor()
-        cursor.execute("SELECT task FROM research_data")
-        rows = cursor.fetchall()
+    cursor = db().cursor()
+    cursor.execute("SELECT task FROM research_data ORDER BY rowid")
+    rows = cursor.fetchall()
 
     past_queries = [row[0] for row in rows] if rows else []
     return jsonify({"past_queries": past_queries})